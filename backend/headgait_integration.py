@@ -3,15 +3,91 @@ HeadGait Model Integration
 Integrates trained TCN and GPR models from H-MOVE-LAB/headgait repository
 """
 
+import os
 import numpy as np
 from scipy import signal
-from scipy.signal import butter, filtfilt
+from scipy.signal import butter, sosfiltfilt
 import pickle
 from pathlib import Path
 from typing import List, Tuple, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
+# Optional numba acceleration (see requirements.txt)
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, nogil=True, fastmath=True)
+    def _find_peaks_numba(x, height, distance):
+        """
+        Local-maxima peak detector with min height and distance, matching
+        scipy.signal.find_peaks: distance pruning removes neighbours of
+        the tallest peaks first rather than scanning greedily left to
+        right (same logic as headgait_numba.detect_ics)
+        """
+        n = x.shape[0]
+
+        # Local maxima above the height threshold
+        cand = np.empty(n, np.int64)
+        k = 0
+        for i in range(1, n - 1):
+            if x[i] > x[i - 1] and x[i] > x[i + 1] and x[i] >= height:
+                cand[k] = i
+                k += 1
+
+        # Distance pruning, tallest peaks first
+        keep = np.ones(k, np.bool_)
+        heights = np.empty(k, x.dtype)
+        for i in range(k):
+            heights[i] = x[cand[i]]
+        priority = np.argsort(heights)
+        for p in range(k - 1, -1, -1):
+            j = priority[p]
+            if not keep[j]:
+                continue
+            m = j - 1
+            while m >= 0 and cand[j] - cand[m] < distance:
+                keep[m] = False
+                m -= 1
+            m = j + 1
+            while m < k and cand[m] - cand[j] < distance:
+                keep[m] = False
+                m += 1
+
+        return cand[:k][keep[:k]]
+
+    @njit(cache=True, nogil=True, fastmath=True)
+    def _gpr_predict_rbf(x, X, alpha, length_scale, const):
+        """Closed-form RBF-kernel GPR mean: k(x, X_train) @ alpha"""
+        acc = 0.0
+        for i in range(X.shape[0]):
+            d = 0.0
+            for j in range(X.shape[1]):
+                t = (X[i, j] - x[j]) / length_scale[j]
+                d += t * t
+            acc += alpha[i] * const * np.exp(-0.5 * d)
+        return acc
+
+    @njit(cache=True, nogil=True, fastmath=True)
+    def _cycle_bounds_numba(ic_indices, min_len):
+        """Return (start, end) index pairs for cycles longer than min_len"""
+        n = ic_indices.shape[0]
+        starts = np.empty(n, np.int64)
+        ends = np.empty(n, np.int64)
+        k = 0
+        for i in range(n - 1):
+            if ic_indices[i + 1] - ic_indices[i] > min_len:
+                starts[k] = ic_indices[i]
+                ends[k] = ic_indices[i + 1]
+                k += 1
+        return starts[:k], ends[:k]
+
+
 class HeadGaitProcessor:
     """
     Process head-worn IMU data using HeadGait models
@@ -27,10 +103,74 @@ class HeadGaitProcessor:
         """
         self.model_path = Path(model_path)
         self.sampling_rate = 20  # Hz
-        
+
+        # Gait frequency band (Hz) used for preprocessing
+        self.band = (0.5, 5.0)
+
+        # Precompute Butterworth coefficients once - the band and sampling
+        # rate are fixed, so there is no need to re-run filter design on
+        # every buffer
+        nyquist = self.sampling_rate / 2
+        self._sos = butter(
+            4,
+            [self.band[0] / nyquist, self.band[1] / nyquist],
+            btype='band',
+            output='sos'
+        )
+
         # Model placeholders
         self.tcn_model = None
         self.gpr_model = None
+        self._tf = None
+        self._tcn_infer = None
+
+        # Quantized TFLite interpreter for the TCN (preferred over the
+        # Keras model on CPU when conversion succeeds)
+        self._tflite = None
+        self._tflite_in = None
+        self._tflite_out = None
+
+        # Rolling cache of per-sample TCN predictions so each tick only
+        # runs inference on newly arrived samples (plus a warmup overlap
+        # covering the receptive field) instead of the whole buffer
+        self._tcn_warmup = 64
+        self._pred_cache = None
+        self._pred_total = 0  # absolute sample count at the cache tail
+
+        # Memoized IC result for stationary stretches: when the window
+        # tail shows no activity, reuse (and shift) the last detected
+        # contacts instead of running the TCN, recomputing at least every
+        # _ic_refresh_ticks calls
+        self._last_ic_indices = None
+        self._ic_stale_ticks = 0
+        self._ic_refresh_ticks = 8
+        self._activity_epsilon = 0.1
+
+        # Streaming filter state: a causal sosfilt with persistent zi lets
+        # each tick filter only the new samples, at the cost of the fixed
+        # phase delay of a causal filter (filtfilt needs the whole window)
+        self._zi = None
+        self._filt_buf = None  # causally filtered copy of the current window
+
+        # Reusable scratch arrays, sized lazily to the window on first use,
+        # so the steady-state per-tick path allocates nothing
+        self._filt_scratch = None
+        self._pred_scratch = None
+        self._norm_scratch = None
+
+        # Sliding window maintained for process_delta callers that push
+        # only new samples instead of keeping their own buffer
+        self._delta_buf = None
+        self._delta_total = 0
+
+        # Closed-form GPR parameters extracted from the sklearn model at
+        # load time (None until a compatible RBF-kernel model is loaded)
+        self._gpr_X = None
+        self._gpr_alpha = None
+        self._gpr_length_scale = None
+        self._gpr_const = 1.0
+        self._gpr_y_mean = 0.0
+        self._gpr_y_std = 1.0
         
         # Load models
         self.load_models()
@@ -42,11 +182,54 @@ class HeadGaitProcessor:
             tcn_path = self.model_path / 'Trained initial contacts model'
             if tcn_path.exists():
                 try:
+                    import tensorflow as tf
                     from tensorflow import keras
+
+                    # FP16 inference: conv layers run ~2x faster and halve
+                    # activation bandwidth; we only need peak locations from
+                    # the predictions so the precision loss is harmless
+                    try:
+                        tf.keras.mixed_precision.set_global_policy('mixed_float16')
+                    except Exception:
+                        pass
+
                     model_file = list(tcn_path.glob('*.h5')) or list(tcn_path.glob('*.keras'))
                     if model_file:
                         self.tcn_model = keras.models.load_model(str(model_file[0]))
+                        self._tf = tf
+
+                        # Graph-compiled direct call skips the per-call
+                        # batching/trace overhead of Model.predict
+                        self._tcn_infer = tf.function(
+                            lambda x: self.tcn_model(x, training=False),
+                            input_signature=[tf.TensorSpec([1, None, 6], tf.float32)]
+                        )
                         print(f"✅ Loaded TCN model: {model_file[0].name}")
+
+                        # Quantize for CPU inference: dynamic-range int8
+                        # weights cut memory bandwidth ~4x and let XNNPACK
+                        # use int8 dot-product instructions. Persist the
+                        # converted model so startup only pays once.
+                        try:
+                            tflite_path = tcn_path / (model_file[0].stem + '.tflite')
+                            if tflite_path.exists():
+                                content = tflite_path.read_bytes()
+                            else:
+                                converter = tf.lite.TFLiteConverter.from_keras_model(self.tcn_model)
+                                converter.optimizations = [tf.lite.Optimize.DEFAULT]
+                                content = converter.convert()
+                                tflite_path.write_bytes(content)
+                            interp = tf.lite.Interpreter(
+                                model_content=content,
+                                num_threads=os.cpu_count()
+                            )
+                            interp.allocate_tensors()
+                            self._tflite = interp
+                            self._tflite_in = interp.get_input_details()[0]
+                            self._tflite_out = interp.get_output_details()[0]
+                            print("✅ TCN quantized via TFLite")
+                        except Exception as e:
+                            print(f"⚠️  Could not quantize TCN via TFLite: {e}")
                     else:
                         print("⚠️  TCN model file not found")
                 except Exception as e:
@@ -60,6 +243,7 @@ class HeadGaitProcessor:
                     if model_file:
                         with open(str(model_file[0]), 'rb') as f:
                             self.gpr_model = pickle.load(f)
+                        self._compile_gpr()
                         print(f"✅ Loaded GPR model: {model_file[0].name}")
                     else:
                         print("⚠️  GPR model file not found")
@@ -72,7 +256,63 @@ class HeadGaitProcessor:
                 
         except Exception as e:
             print(f"⚠️  Error loading models: {e}")
-    
+
+    @staticmethod
+    def _extract_rbf_kernel(kernel):
+        """
+        Walk a fitted kernel tree and return (constant, rbf) when it is
+        exactly an RBF, optionally scaled by ConstantKernel products and
+        summed with WhiteKernel noise (which contributes nothing to the
+        cross-covariance). Anything else - Matern, RationalQuadratic,
+        etc. - returns None so prediction stays with sklearn; those
+        kernels also expose a length_scale but follow different formulas.
+        """
+        from sklearn.gaussian_process import kernels as sk_kernels
+
+        if type(kernel) is sk_kernels.RBF:
+            return 1.0, kernel
+        if isinstance(kernel, sk_kernels.Product):
+            for wrap, rest in ((kernel.k1, kernel.k2), (kernel.k2, kernel.k1)):
+                if type(wrap) is sk_kernels.ConstantKernel:
+                    inner = HeadGaitProcessor._extract_rbf_kernel(rest)
+                    if inner is not None:
+                        return float(wrap.constant_value) * inner[0], inner[1]
+            return None
+        if isinstance(kernel, sk_kernels.Sum):
+            for wrap, rest in ((kernel.k1, kernel.k2), (kernel.k2, kernel.k1)):
+                if type(wrap) is sk_kernels.WhiteKernel:
+                    return HeadGaitProcessor._extract_rbf_kernel(rest)
+            return None
+        return None
+
+    def _compile_gpr(self):
+        """
+        Extract the GPR's training data, dual weights, and RBF kernel
+        hyperparameters so prediction is a direct kernel evaluation
+        instead of a trip through sklearn's predict machinery
+        """
+        try:
+            extracted = self._extract_rbf_kernel(self.gpr_model.kernel_)
+            if extracted is None:
+                return  # not an RBF kernel; keep sklearn predict
+            const, rbf = extracted
+            length_scale = np.atleast_1d(
+                np.asarray(rbf.length_scale, dtype=np.float64))
+
+            X = np.asarray(self.gpr_model.X_train_, dtype=np.float64)
+            if length_scale.shape[0] == 1:
+                length_scale = np.full(X.shape[1], length_scale[0])
+
+            self._gpr_X = X
+            self._gpr_alpha = np.asarray(self.gpr_model.alpha_, dtype=np.float64).ravel()
+            self._gpr_length_scale = length_scale
+            self._gpr_const = const
+            # normalize_y support: predict() rescales by the training stats
+            self._gpr_y_mean = float(np.ravel(getattr(self.gpr_model, '_y_train_mean', 0.0))[0])
+            self._gpr_y_std = float(np.ravel(getattr(self.gpr_model, '_y_train_std', 1.0))[0])
+        except Exception as e:
+            print(f"⚠️  Could not extract GPR kernel parameters: {e}")
+
     def preprocess_signal(self, data: np.ndarray) -> np.ndarray:
         """
         Preprocess IMU signal as per HeadGait methodology
@@ -85,12 +325,17 @@ class HeadGaitProcessor:
             Preprocessed data
         """
         # 1. Bandpass filter (0.5-5 Hz) - typical gait frequency range
-        filtered_data = self.bandpass_filter(data, 0.5, 5.0)
-        
-        # 2. Normalize each channel
-        normalized_data = self.normalize_signal(filtered_data)
-        
-        return normalized_data
+        out = self.bandpass_filter(data, *self.band)
+
+        # 2. Normalize each channel in place - the filter output is a fresh
+        #    array we own, so fusing the normalization into it avoids one
+        #    more full read+write pass over the buffer
+        mean = out.mean(axis=0)
+        std = out.std(axis=0)
+        np.subtract(out, mean, out=out)
+        np.divide(out, np.where(std > 0, std, 1.0), out=out)
+
+        return out
     
     def bandpass_filter(self, data: np.ndarray, lowcut: float, highcut: float) -> np.ndarray:
         """
@@ -104,20 +349,61 @@ class HeadGaitProcessor:
         Returns:
             Filtered signal
         """
-        nyquist = self.sampling_rate / 2
-        low = lowcut / nyquist
-        high = highcut / nyquist
-        
-        # 4th order Butterworth filter
-        b, a = butter(4, [low, high], btype='band')
-        
-        # Apply filter to each column
-        filtered = np.zeros_like(data)
-        for i in range(data.shape[1]):
-            filtered[:, i] = filtfilt(b, a, data[:, i])
-        
-        return filtered
+        # Reuse the cached coefficients for the standard gait band;
+        # only re-run filter design for non-default cutoffs
+        if (lowcut, highcut) == self.band:
+            sos = self._sos
+        else:
+            nyquist = self.sampling_rate / 2
+            sos = butter(
+                4, [lowcut / nyquist, highcut / nyquist],
+                btype='band', output='sos'
+            )
+
+        # sosfiltfilt is vectorized across columns, so one call filters
+        # all 6 channels instead of looping per channel. It computes in
+        # float64 internally; cast back so float32 buffers stay float32
+        # through the rest of the pipeline
+        return sosfiltfilt(sos, data, axis=0).astype(data.dtype, copy=False)
     
+    def filter_streaming(self, new_samples: np.ndarray) -> np.ndarray:
+        """
+        Causally bandpass-filter new samples, carrying filter state
+        across calls
+
+        Args:
+            new_samples: New IMU samples [n_new x n_channels]
+
+        Returns:
+            Filtered samples (same shape/dtype)
+        """
+        if self._zi is None:
+            self._zi = np.zeros((self._sos.shape[0], 2, new_samples.shape[1]))
+        y, self._zi = signal.sosfilt(self._sos, new_samples, axis=0, zi=self._zi)
+        return y.astype(new_samples.dtype, copy=False)
+
+    def _filter_window(self, data: np.ndarray, n_new: int) -> np.ndarray:
+        """
+        Maintain a causally filtered copy of the sliding window, filtering
+        only the samples appended since the previous call
+        """
+        buf = self._filt_buf
+        if buf is None or len(buf) != len(data) or not 0 <= n_new < len(data):
+            # (Re)initialize: filter the whole window once, priming zi
+            self._zi = None
+            self._filt_buf = self.filter_streaming(data)
+        elif n_new > 0:
+            # Double-buffer: shift into the scratch array and recycle the
+            # old window as next tick's scratch
+            shifted = self._filt_scratch
+            if shifted is None or shifted.shape != buf.shape:
+                shifted = np.empty_like(buf)
+            shifted[:-n_new] = buf[n_new:]
+            shifted[-n_new:] = self.filter_streaming(data[-n_new:])
+            self._filt_scratch = buf
+            self._filt_buf = shifted
+        return self._filt_buf
+
     def normalize_signal(self, data: np.ndarray) -> np.ndarray:
         """
         Normalize signal to zero mean and unit variance
@@ -128,42 +414,128 @@ class HeadGaitProcessor:
         Returns:
             Normalized signal
         """
-        normalized = np.zeros_like(data)
-        for i in range(data.shape[1]):
-            mean = np.mean(data[:, i])
-            std = np.std(data[:, i])
-            if std > 0:
-                normalized[:, i] = (data[:, i] - mean) / std
-            else:
-                normalized[:, i] = data[:, i] - mean
-        
-        return normalized
+        # Single vectorized pass over all channels; constant channels
+        # (std == 0) are just mean-centered
+        mean = data.mean(axis=0, keepdims=True)
+        std = data.std(axis=0, keepdims=True)
+        return (data - mean) / np.where(std > 0, std, 1.0)
     
-    def detect_initial_contacts(self, data: np.ndarray) -> np.ndarray:
+    def _run_tcn(self, data: np.ndarray) -> np.ndarray:
+        """Run one TCN forward pass, returning per-sample predictions"""
+        # Reshape for TCN model (batch, timesteps, features)
+        data_reshaped = data.reshape(1, data.shape[0], data.shape[1]).astype(np.float32, copy=False)
+
+        # Prefer the quantized TFLite interpreter on CPU
+        if self._tflite is not None:
+            try:
+                interp = self._tflite
+                if tuple(self._tflite_in['shape']) != data_reshaped.shape:
+                    interp.resize_tensor_input(self._tflite_in['index'], data_reshaped.shape)
+                    interp.allocate_tensors()
+                    self._tflite_in = interp.get_input_details()[0]
+                    self._tflite_out = interp.get_output_details()[0]
+                interp.set_tensor(self._tflite_in['index'], data_reshaped)
+                interp.invoke()
+                return interp.get_tensor(self._tflite_out['index']).ravel()
+            except Exception as e:
+                print(f"Error in TFLite inference: {e}")
+
+        # Compiled graph call when available (avoids Model.predict's
+        # per-call overhead)
+        if self._tcn_infer is not None:
+            return self._tcn_infer(self._tf.constant(data_reshaped)).numpy().ravel()
+        return self.tcn_model.predict(data_reshaped, verbose=0).flatten()
+
+    def _tcn_predictions(self, data: np.ndarray, n_new: Optional[int]) -> np.ndarray:
+        """
+        Per-sample TCN predictions for the buffer, reusing cached values
+        for the unchanged prefix of the sliding window.
+
+        Args:
+            data: Preprocessed IMU data [n_samples x 6]
+            n_new: Number of samples appended since the previous call, or
+                   None to force a full forward pass
+
+        Returns:
+            Prediction vector [n_samples]
+        """
+        n = data.shape[0]
+        cache = self._pred_cache
+
+        # Full pass when the cache can't be aligned to this window
+        if (n_new is None or cache is None or len(cache) != n
+                or n_new < 0 or n_new + self._tcn_warmup >= n):
+            preds = self._run_tcn(data)
+            self._pred_cache = preds
+            return preds
+
+        if n_new == 0:
+            return cache
+
+        # Slide the cache left and recompute only the tail; the warmup
+        # overlap lets the TCN's receptive field settle before the region
+        # whose predictions we keep
+        tail = self._run_tcn(data[n - n_new - self._tcn_warmup:])
+        preds = self._pred_scratch
+        if preds is None or preds.shape != cache.shape:
+            preds = np.empty_like(cache)
+        preds[:n - n_new] = cache[n_new:]
+        preds[n - n_new:] = tail[-n_new:]
+        self._pred_scratch = cache
+        self._pred_cache = preds
+        return preds
+
+    def detect_initial_contacts(self, data: np.ndarray, n_new: Optional[int] = None) -> np.ndarray:
         """
         Detect initial contacts using TCN model
-        
+
         Args:
             data: Preprocessed IMU data [n_samples x 6]
-            
+            n_new: Number of samples appended since the previous call
+                   (enables incremental TCN inference)
+
         Returns:
             Array of initial contact indices
         """
         if self.tcn_model is not None:
             try:
-                # Reshape for TCN model (batch, timesteps, features)
-                data_reshaped = data.reshape(1, data.shape[0], data.shape[1])
-                
-                # Predict initial contacts
-                predictions = self.tcn_model.predict(data_reshaped, verbose=0)
-                predictions = predictions.flatten()
-                
+                # Stationary tail: reuse the previous contacts (shifted to
+                # the new window) instead of running inference, but refresh
+                # periodically so we can't stay stale indefinitely
+                if (n_new is not None and self._last_ic_indices is not None
+                        and self._ic_stale_ticks < self._ic_refresh_ticks
+                        and float(data[-50:].std()) < self._activity_epsilon):
+                    self._ic_stale_ticks += 1
+                    # The prediction cache is not slid during skipped
+                    # ticks, so it can't be realigned when inference
+                    # resumes - drop it and take a full pass then
+                    self._pred_cache = None
+                    # Shift cached contacts only by how far the window
+                    # actually slid (zero while the buffer is filling)
+                    total = self._pred_total
+                    n = data.shape[0]
+                    shift = max(total - n, 0) - max(total - n_new - n, 0)
+                    if shift:
+                        shifted = self._last_ic_indices - shift
+                        self._last_ic_indices = shifted[shifted >= 0]
+                    return self._last_ic_indices
+
+                predictions = self._tcn_predictions(data, n_new)
+
                 # Find peaks in predictions (threshold = 0.5)
-                from scipy.signal import find_peaks
-                peaks, _ = find_peaks(predictions, height=0.5, distance=10)
-                
+                if NUMBA_AVAILABLE:
+                    peaks = _find_peaks_numba(
+                        np.ascontiguousarray(predictions, dtype=np.float64),
+                        0.5, 10
+                    )
+                else:
+                    from scipy.signal import find_peaks
+                    peaks, _ = find_peaks(predictions, height=0.5, distance=10)
+
+                self._last_ic_indices = peaks
+                self._ic_stale_ticks = 0
                 return peaks
-                
+
             except Exception as e:
                 print(f"Error in TCN prediction: {e}")
                 return self._fallback_ic_detection(data)
@@ -177,15 +549,14 @@ class HeadGaitProcessor:
         """
         # Use vertical acceleration (Z-axis)
         accel_z = data[:, 2]
-        
-        # Find peaks
+        height = np.mean(accel_z) + 0.5 * np.std(accel_z)
+        distance = int(self.sampling_rate * 0.4)
+
+        if NUMBA_AVAILABLE:
+            return _find_peaks_numba(np.ascontiguousarray(accel_z), height, distance)
+
         from scipy.signal import find_peaks
-        peaks, _ = find_peaks(
-            accel_z,
-            height=np.mean(accel_z) + 0.5 * np.std(accel_z),
-            distance=int(self.sampling_rate * 0.4)
-        )
-        
+        peaks, _ = find_peaks(accel_z, height=height, distance=distance)
         return peaks
     
     def extract_features(self, gait_cycles: List[np.ndarray]) -> np.ndarray:
@@ -208,32 +579,72 @@ class HeadGaitProcessor:
         """
         if not gait_cycles:
             return np.zeros(9)
-        
-        # Average features across all cycles
-        all_features = []
-        
-        for cycle in gait_cycles:
-            cycle_features = []
-            
-            # Extract features from each sensor axis
-            for axis in range(min(6, cycle.shape[1])):
-                signal = cycle[:, axis]
-                
-                # Time-domain features
-                cycle_features.extend([
-                    np.mean(signal),           # Mean
-                    np.std(signal),            # Std
-                    np.ptp(signal),            # Range
-                ])
-            
-            all_features.append(cycle_features)
-        
-        # Average across cycles
-        mean_features = np.mean(all_features, axis=0)
-        
+
+        # Stack variable-length cycles into one NaN-padded array so each
+        # statistic is a single vectorized call instead of a per-cycle,
+        # per-axis Python loop
+        n_axes = min(6, gait_cycles[0].shape[1])
+        max_len = max(cycle.shape[0] for cycle in gait_cycles)
+        padded = np.full((len(gait_cycles), max_len, n_axes), np.nan)
+        for i, cycle in enumerate(gait_cycles):
+            padded[i, :cycle.shape[0]] = cycle[:, :n_axes]
+
+        # Per-cycle statistics over the time axis: [n_cycles x n_axes] each
+        means = np.nanmean(padded, axis=1)
+        stds = np.nanstd(padded, axis=1)
+        ranges = np.nanmax(padded, axis=1) - np.nanmin(padded, axis=1)
+
+        # Interleave as (mean, std, range) per axis, then average across cycles
+        all_features = np.stack([means, stds, ranges], axis=2).reshape(len(gait_cycles), -1)
+        mean_features = all_features.mean(axis=0)
+
         # Return first 9 features (as per HeadGait paper)
         return mean_features[:9]
     
+    def _extract_features_indexed(self, preprocessed: np.ndarray,
+                                  starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """
+        Same features as extract_features, computed from cycle boundary
+        indices into the full preprocessed buffer. Prefix sums make each
+        cycle's mean/std O(1), and min/max use segmented reduceat, so no
+        per-cycle arrays are materialized.
+
+        Args:
+            preprocessed: Full preprocessed buffer [n_samples x 6]
+            starts/ends: Cycle boundary index pairs (start inclusive,
+                        end exclusive)
+
+        Returns:
+            Feature vector [9 features]
+        """
+        if len(starts) == 0:
+            return np.zeros(9)
+
+        n_axes = min(6, preprocessed.shape[1])
+        x = preprocessed[:, :n_axes]
+        lens = (ends - starts).astype(np.float64)[:, None]
+
+        # Prefix sums of x and x^2 (float64 accumulators for stable variance)
+        zero = np.zeros((1, n_axes))
+        s1 = np.concatenate((zero, np.cumsum(x, axis=0, dtype=np.float64)))
+        s2 = np.concatenate((zero, np.cumsum(np.square(x, dtype=np.float64), axis=0)))
+
+        means = (s1[ends] - s1[starts]) / lens
+        variances = (s2[ends] - s2[starts]) / lens - means ** 2
+        stds = np.sqrt(np.maximum(variances, 0.0))
+
+        # Segmented min/max over [start, end) pairs; odd slots cover the
+        # gaps between cycles and are discarded
+        bounds = np.column_stack((starts, ends)).ravel()
+        ranges = (np.maximum.reduceat(x, bounds, axis=0)[::2]
+                  - np.minimum.reduceat(x, bounds, axis=0)[::2])
+
+        # Interleave as (mean, std, range) per axis, then average across cycles
+        all_features = np.stack([means, stds, ranges], axis=2).reshape(len(starts), -1)
+
+        # Return first 9 features (as per HeadGait paper)
+        return all_features.mean(axis=0)[:9]
+
     def estimate_gait_speed(self, features: np.ndarray) -> float:
         """
         Estimate gait speed using GPR model
@@ -246,15 +657,30 @@ class HeadGaitProcessor:
         """
         if self.gpr_model is not None and len(features) == 9:
             try:
-                # Predict speed using GPR model
-                features_reshaped = features.reshape(1, -1)
-                speed = self.gpr_model.predict(features_reshaped)[0]
-                
+                # Closed-form kernel evaluation when the hyperparameters
+                # were extracted at load time - sklearn's predict dispatch
+                # dominates for a single 9-feature input
+                if self._gpr_X is not None:
+                    x = np.asarray(features, dtype=np.float64)
+                    if NUMBA_AVAILABLE:
+                        speed = _gpr_predict_rbf(
+                            x, self._gpr_X, self._gpr_alpha,
+                            self._gpr_length_scale, self._gpr_const
+                        )
+                    else:
+                        scaled = (self._gpr_X - x) / self._gpr_length_scale
+                        k = self._gpr_const * np.exp(-0.5 * (scaled * scaled).sum(axis=1))
+                        speed = float(k @ self._gpr_alpha)
+                    speed = speed * self._gpr_y_std + self._gpr_y_mean
+                else:
+                    # Predict speed using GPR model
+                    speed = self.gpr_model.predict(features.reshape(1, -1))[0]
+
                 # Ensure reasonable bounds (0-4 m/s)
                 speed = np.clip(speed, 0, 4.0)
-                
+
                 return float(speed)
-                
+
             except Exception as e:
                 print(f"Error in GPR prediction: {e}")
                 return self._fallback_speed_estimation(features)
@@ -276,17 +702,35 @@ class HeadGaitProcessor:
         
         return float(estimated_speed)
     
-    def process_buffer(self, buffer_data: List[dict]) -> dict:
+    def process_buffer(self, buffer_data: List[dict], total_samples: Optional[int] = None) -> dict:
         """
         Process buffered IMU data and extract gait metrics
-        
+
         Args:
-            buffer_data: List of IMU samples with keys:
-                        pitch, yaw, roll, accelX, accelY, accelZ
-        
+            buffer_data: Preassembled [n_samples x 6] array in column order
+                        (accelX, accelY, accelZ, pitch, yaw, roll), or a
+                        list of IMU sample dicts with those keys
+            total_samples: Absolute count of samples ever received for this
+                        session; lets the TCN prediction cache recompute
+                        only the new tail of the sliding window
+
         Returns:
             Dictionary with gait metrics
         """
+        # Work out how many samples are new since the previous call
+        n_new = None
+        if total_samples is not None:
+            if total_samples >= self._pred_total:
+                n_new = total_samples - self._pred_total
+            else:
+                # Session restarted - invalidate prediction and filter state
+                self._pred_cache = None
+                self._filt_buf = None
+                self._zi = None
+                self._last_ic_indices = None
+                self._ic_stale_ticks = 0
+            self._pred_total = total_samples
+
         if len(buffer_data) < 100:
             return {
                 'gait_speed': 0.0,
@@ -295,32 +739,56 @@ class HeadGaitProcessor:
                 'initial_contacts': 0,
                 'status': 'insufficient_data'
             }
-        
-        # Convert to numpy array
-        data = np.array([
-            [s['accelX'], s['accelY'], s['accelZ'],
-             s['pitch'], s['yaw'], s['roll']]
-            for s in buffer_data
-        ])
-        
-        # 1. Preprocess
-        preprocessed = self.preprocess_signal(data)
+
+        # Accept an ndarray directly (ring-buffer view from the server);
+        # fall back to converting a list of dicts
+        if isinstance(buffer_data, np.ndarray):
+            data = buffer_data
+        else:
+            # fromiter writes straight into a preallocated array instead
+            # of materializing an intermediate list of Python floats
+            data = np.fromiter(
+                (v for s in buffer_data
+                 for v in (s['accelX'], s['accelY'], s['accelZ'],
+                           s['pitch'], s['yaw'], s['roll'])),
+                dtype=np.float32, count=6 * len(buffer_data)
+            ).reshape(-1, 6)
+        
+        # 1. Preprocess: stream the causal filter over just the new samples
+        #    when the caller tells us how many there are; otherwise fall
+        #    back to the zero-phase full-buffer path
+        if n_new is not None:
+            filtered = self._filter_window(data, n_new)
+
+            # Normalize into the reusable scratch array (the filtered
+            # window itself must stay intact for the next tick's shift)
+            out = self._norm_scratch
+            if out is None or out.shape != filtered.shape:
+                out = np.empty_like(filtered)
+                self._norm_scratch = out
+            mean = filtered.mean(axis=0)
+            std = filtered.std(axis=0)
+            np.subtract(filtered, mean, out=out)
+            np.divide(out, np.where(std > 0, std, 1.0), out=out)
+            preprocessed = out
+        else:
+            preprocessed = self.preprocess_signal(data)
         
         # 2. Detect initial contacts
-        ic_indices = self.detect_initial_contacts(preprocessed)
-        
-        # 3. Extract gait cycles
-        gait_cycles = []
-        for i in range(len(ic_indices) - 1):
-            start = ic_indices[i]
-            end = ic_indices[i + 1]
-            
-            if end - start > 5:  # Valid cycle (>0.25s)
-                cycle = preprocessed[start:end]
-                gait_cycles.append(cycle)
-        
-        # 4. Extract features
-        features = self.extract_features(gait_cycles)
+        ic_indices = self.detect_initial_contacts(preprocessed, n_new=n_new)
+        
+        # 3. Extract gait cycle boundaries (valid cycle = >0.25s between
+        #    contacts) - index pairs only, no per-cycle slices
+        min_cycle_len = 5
+        ic = np.asarray(ic_indices, dtype=np.int64)
+        if NUMBA_AVAILABLE:
+            starts, ends = _cycle_bounds_numba(ic, min_cycle_len)
+        else:
+            valid = np.diff(ic) > min_cycle_len
+            starts, ends = ic[:-1][valid], ic[1:][valid]
+
+        # 4. Extract features via prefix sums over the full buffer
+        features = self._extract_features_indexed(preprocessed, starts, ends)
         
         # 5. Estimate gait speed
         gait_speed = self.estimate_gait_speed(features)
@@ -333,13 +801,48 @@ class HeadGaitProcessor:
             cadence = 0.0
         
         return {
-            'gait_speed': round(gait_speed, 2),
-            'stride_count': len(gait_cycles),
-            'cadence': round(cadence, 1),
+            # Raw floats: the dashboard formats with toFixed()
+            'gait_speed': gait_speed,
+            'stride_count': len(starts),
+            'cadence': cadence,
             'initial_contacts': len(ic_indices),
             'status': 'analyzing'
         }
 
+    def process_delta(self, new_samples, window_size: int = 500) -> dict:
+        """
+        Push only newly arrived samples and get metrics for the maintained
+        sliding window
+
+        Convenience wrapper around process_buffer() for callers that don't
+        keep their own ring buffer: the processor holds the window itself
+        and threads the running sample count through, so the streaming
+        filter and TCN prediction caches only touch the new tail.
+
+        Args:
+            new_samples: [n_new x 6] array (or a single sample row) in the
+                        same column order as process_buffer
+            window_size: Sliding window length in samples (default 500,
+                        matching the server buffer)
+
+        Returns:
+            Dictionary with gait metrics
+        """
+        new = np.asarray(new_samples, dtype=np.float32)
+        if new.ndim == 1:
+            new = new.reshape(1, -1)
+
+        if self._delta_buf is None or self._delta_buf.shape[1] != new.shape[1]:
+            self._delta_buf = new[-window_size:].copy()
+            self._delta_total = len(new)
+        else:
+            self._delta_buf = np.concatenate(
+                (self._delta_buf, new))[-window_size:]
+            self._delta_total += len(new)
+
+        return self.process_buffer(self._delta_buf,
+                                   total_samples=self._delta_total)
+
 # Singleton instance
 _processor = None
 
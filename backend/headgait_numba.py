@@ -0,0 +1,80 @@
+"""
+Numba-accelerated kernels for the fallback gait analysis
+Used by server.py when the HeadGait models are unavailable
+"""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True, nogil=True)
+def detect_ics(x, height, distance, prominence):
+    """
+    Detect initial contacts in a 1-D signal: local maxima filtered by
+    minimum height, minimum peak distance, and minimum prominence.
+    Follows scipy.signal.find_peaks semantics (distance pruning keeps
+    the taller peak; prominence bases extend to the signal edge or the
+    first higher sample).
+
+    Args:
+        x: 1-D signal
+        height: Minimum peak height
+        distance: Minimum samples between kept peaks
+        prominence: Minimum peak prominence
+
+    Returns:
+        Array of peak indices
+    """
+    n = x.shape[0]
+
+    # 1. Local maxima above the height threshold
+    cand = np.empty(n, np.int64)
+    k = 0
+    for i in range(1, n - 1):
+        if x[i] > x[i - 1] and x[i] > x[i + 1] and x[i] >= height:
+            cand[k] = i
+            k += 1
+
+    # 2. Distance pruning, tallest peaks first
+    keep = np.ones(k, np.bool_)
+    heights = np.empty(k, x.dtype)
+    for i in range(k):
+        heights[i] = x[cand[i]]
+    priority = np.argsort(heights)
+    for p in range(k - 1, -1, -1):
+        j = priority[p]
+        if not keep[j]:
+            continue
+        m = j - 1
+        while m >= 0 and cand[j] - cand[m] < distance:
+            keep[m] = False
+            m -= 1
+        m = j + 1
+        while m < k and cand[m] - cand[j] < distance:
+            keep[m] = False
+            m += 1
+
+    # 3. Prominence filter
+    out = np.empty(k, np.int64)
+    c = 0
+    for idx in range(k):
+        if not keep[idx]:
+            continue
+        i = cand[idx]
+        left_min = x[i]
+        m = i - 1
+        while m >= 0 and x[m] <= x[i]:
+            if x[m] < left_min:
+                left_min = x[m]
+            m -= 1
+        right_min = x[i]
+        m = i + 1
+        while m < n and x[m] <= x[i]:
+            if x[m] < right_min:
+                right_min = x[m]
+            m += 1
+        if x[i] - max(left_min, right_min) >= prominence:
+            out[c] = i
+            c += 1
+
+    return out[:c]
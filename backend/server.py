@@ -8,13 +8,68 @@ import asyncio
 import websockets
 import json
 import sys
-from collections import deque
+import time
+import logging
+import logging.handlers
+import queue
+import numpy as np
+from scipy.signal import find_peaks
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+# C-accelerated JSON for the per-message hot path (falls back to stdlib)
+try:
+    import orjson
+
+    json_loads = orjson.loads
+
+    def json_dumps(obj):
+        # .decode() keeps outgoing frames as text: the dashboard client
+        # JSON.parses event.data and would receive a Blob for binary frames
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
+# Typed decoding of inbound IMU frames: msgspec validates field presence
+# and types during the C-side parse, with no intermediate dict
+try:
+    import msgspec
+
+    class IMUSample(msgspec.Struct):
+        pitch: float
+        yaw: float
+        roll: float
+        accelX: float
+        accelY: float
+        accelZ: float
+
+    _imu_decoder = msgspec.json.Decoder(IMUSample)
+    decode_imu = _imu_decoder.decode
+    _DECODE_ERRORS = (json.JSONDecodeError, msgspec.DecodeError)
+except ImportError:
+    IMUSample = None
+    decode_imu = None
+    _DECODE_ERRORS = (json.JSONDecodeError,)
+
+# Optional numba-accelerated fallback peak detector
+try:
+    from headgait_numba import detect_ics
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Optional libuv-based event loop: faster socket reads/writes and timer
+# handling than the default selector loop
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
 
 # Import HeadGait integration
 try:
-    from headgait_integration import get_processor
+    from headgait_integration import HeadGaitProcessor
     HEADGAIT_AVAILABLE = True
     print("✅ HeadGait integration module loaded")
 except ImportError as e:
@@ -28,31 +83,95 @@ PORT = int(os.getenv("PORT", 8000))
 BUFFER_SIZE = 500  # Number of samples (25 seconds at 20Hz)
 SAMPLING_RATE = 20  # Hz
 UPDATE_INTERVAL = 0.5  # Process every 0.5 seconds
+MAX_BATCH_FRAMES = 32  # Cap on frames drained per batch (bounds added latency)
+
+# Fields every IMU sample must carry (C-level subset check per sample)
+_REQUIRED_FIELDS = frozenset(('pitch', 'yaw', 'roll', 'accelX', 'accelY', 'accelZ'))
+
+# If accel-Z variance is below this, person is probably stationary
+# (higher = less sensitive)
+MOTION_THRESHOLD = 0.1
+
+# Pre-built JSON for the early-exit branches of analyze(): only the
+# counters vary, so the idle path splices integers into a template
+# instead of building a dict and encoding it every tick
+_INSUFFICIENT_TEMPLATE = (
+    '{"gait_speed":0.0,"stride_count":0,"total_strides":%d,"cadence":0.0,'
+    '"initial_contacts":0,"status":"insufficient_data","buffer_size":%d,'
+    '"using_headgait":%s}'
+)
+_STATIONARY_TEMPLATE = (
+    '{"gait_speed":0.0,"stride_count":0,"total_strides":%d,"cadence":0.0,'
+    '"initial_contacts":0,"status":"stationary","buffer_size":%d,'
+    '"using_headgait":%s}'
+)
+
+# Per-tick logging goes through a queue so formatting and stdout I/O run on
+# a background thread instead of blocking the event loop
+logger = logging.getLogger("gait")
+_log_queue = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+logger.setLevel(logging.INFO)
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
 
 class GaitAnalyzer:
     """Real-time gait analysis using HeadGait models"""
     
     def __init__(self):
-        self.data_buffer = deque(maxlen=BUFFER_SIZE)
+        # SoA ring buffer: one preallocated float32 row per sample, column
+        # order matches the HeadGait processor input
+        # (accelX, accelY, accelZ, pitch, yaw, roll).
+        # 24 KB total, allocated once - versus ~400 bytes/sample (dict +
+        # six boxed floats) and constant GC pressure with the old
+        # deque-of-dicts layout.
+        # Each sample is written to both halves (mirror trick), so the
+        # last n samples are always one contiguous zero-copy slice even
+        # after the ring wraps
+        self._ring = np.zeros((BUFFER_SIZE * 2, 6), dtype=np.float32)
+        self._head = 0   # next write position
+        self._count = 0  # number of valid samples (saturates at BUFFER_SIZE)
+        self._total_written = 0  # absolute sample count for this session
+
+        # Running accel-Z sums, updated O(1) per sample, so variance/std
+        # never needs a full-buffer scan on the analysis tick
+        self._sum_az = 0.0       # over the whole ring
+        self._sumsq_az = 0.0
+
+        # Exponential moving mean/variance of accel-Z for the motion gate
+        # (alpha 0.05 ~ 20-sample horizon); updated O(1) per sample so the
+        # stationary early-exit never touches an array
+        self._ema_alpha = 0.05
+        self._az_ema_mean = 0.0
+        self._az_ema_var = 0.0
         self.sampling_rate = SAMPLING_RATE
-        
+
+        # Serializes analyze() across concurrent websocket tasks so the
+        # cumulative counters are only mutated by one worker at a time
+        self.analyze_lock = asyncio.Lock()
+
         # Cumulative counters (never decrease)
         self.total_strides = 0
         self.total_ics = 0  # Track total initial contacts cumulatively
         self.session_start_time = None
         self.last_ic_count = 0
         
-        # Initialize HeadGait processor
+        # Initialize HeadGait processor. One processor per analyzer (not
+        # the module singleton): its streaming filter state and prediction
+        # caches belong to a single session
         self.use_headgait = HEADGAIT_AVAILABLE
         if self.use_headgait:
             try:
-                self.headgait_processor = get_processor()
+                self.headgait_processor = HeadGaitProcessor()
                 print("✅ HeadGait processor initialized")
             except Exception as e:
                 print(f"⚠️  Could not initialize HeadGait processor: {e}")
                 print("   Falling back to simple algorithms")
                 self.use_headgait = False
         
+        # Cached serialized response for the stationary fast path
+        self._last_payload = None
+        self._last_compute = 0.0
+
         # Metrics
         self.last_metrics = {
             'gait_speed': 0.0,
@@ -62,12 +181,73 @@ class GaitAnalyzer:
             'status': 'waiting_for_data'
         }
     
-    def add_data_point(self, data: dict):
-        """Add IMU data point to buffer"""
-        # Ensure all required fields exist
-        required_fields = ['pitch', 'yaw', 'roll', 'accelX', 'accelY', 'accelZ']
-        if all(field in data for field in required_fields):
-            self.data_buffer.append(data)
+    def add_data_point(self, data):
+        """Add IMU data point (decoded IMUSample or dict) to buffer"""
+        if isinstance(data, dict):
+            # Ensure all required fields exist
+            if not (_REQUIRED_FIELDS <= data.keys()):
+                return
+            row = (data['accelX'], data['accelY'], data['accelZ'],
+                   data['pitch'], data['yaw'], data['roll'])
+        else:
+            # IMUSample: presence and types already validated by the decoder
+            row = (data.accelX, data.accelY, data.accelZ,
+                   data.pitch, data.yaw, data.roll)
+
+        # Retire the overwritten sample from the full-buffer sums
+        if self._count == BUFFER_SIZE:
+            old = float(self._ring[self._head, 2])
+            self._sum_az -= old
+            self._sumsq_az -= old * old
+
+        self._ring[self._head] = row
+        self._ring[self._head + BUFFER_SIZE] = row
+
+        # Accumulate the stored (float32-rounded) value so additions
+        # and later retirements cancel exactly
+        az = float(self._ring[self._head, 2])
+        self._sum_az += az
+        self._sumsq_az += az * az
+
+        self._head = (self._head + 1) % BUFFER_SIZE
+        if self._count < BUFFER_SIZE:
+            self._count += 1
+        self._total_written += 1
+
+        # EMA motion gate
+        diff = az - self._az_ema_mean
+        self._az_ema_mean += self._ema_alpha * diff
+        self._az_ema_var += self._ema_alpha * (diff * diff - self._az_ema_var)
+
+    # Ring-buffer column indices by field name
+    _COLUMNS = {'accelX': 0, 'accelY': 1, 'accelZ': 2,
+                'pitch': 3, 'yaw': 4, 'roll': 5}
+
+    def column_view(self, field: str, n: Optional[int] = None) -> np.ndarray:
+        """Return the last n samples of one channel in chronological order"""
+        return self.buffer_view(n)[:, self._COLUMNS[field]]
+
+    def buffer_view(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        Return the last n samples (all by default) in chronological order.
+        Always a zero-copy slice thanks to the mirrored ring halves.
+        """
+        if n is None or n > self._count:
+            n = self._count
+        end = self._head + BUFFER_SIZE
+        return self._ring[end - n:end]
+
+    def clear_buffer(self):
+        """Drop all buffered samples"""
+        self._head = 0
+        self._count = 0
+        self._total_written = 0
+        self._sum_az = 0.0
+        self._sumsq_az = 0.0
+        self._az_ema_mean = 0.0
+        self._az_ema_var = 0.0
+        self._last_payload = None
+        self._last_compute = 0.0
     
     def analyze(self) -> Dict:
         """
@@ -76,7 +256,7 @@ class GaitAnalyzer:
         Returns:
             Dictionary with gait metrics
         """
-        if len(self.data_buffer) < 100:
+        if self._count < 100:
             return {
                 'gait_speed': 0.0,
                 'stride_count': 0,
@@ -84,18 +264,15 @@ class GaitAnalyzer:
                 'cadence': 0.0,
                 'initial_contacts': 0,
                 'status': 'insufficient_data',
-                'buffer_size': len(self.data_buffer),
+                'buffer_size': self._count,
                 'using_headgait': self.use_headgait
             }
-        
-        # Check if there's actual movement (not just noise)
-        import numpy as np
-        recent_data = list(self.data_buffer)[-100:]  # Last 100 samples (5 seconds)
-        accel_z = np.array([d['accelZ'] for d in recent_data])
-        accel_variance = np.var(accel_z)
+
+        # Check if there's actual movement (not just noise) - the EMA
+        # variance is maintained per sample, so this is a scalar compare
+        accel_variance = self._az_ema_var
         
         # If variance is too low, person is probably stationary
-        MOTION_THRESHOLD = 0.1  # Adjust this value (higher = less sensitive)
         if accel_variance < MOTION_THRESHOLD:
             return {
                 'gait_speed': 0.0,
@@ -104,15 +281,17 @@ class GaitAnalyzer:
                 'cadence': 0.0,
                 'initial_contacts': 0,
                 'status': 'stationary',
-                'buffer_size': len(self.data_buffer),
+                'buffer_size': self._count,
                 'using_headgait': self.use_headgait
             }
-        
+
         # Use HeadGait processor if available
         if self.use_headgait:
             try:
-                metrics = self.headgait_processor.process_buffer(list(self.data_buffer))
-                metrics['buffer_size'] = len(self.data_buffer)
+                metrics = self.headgait_processor.process_buffer(
+                    self.buffer_view(), total_samples=self._total_written
+                )
+                metrics['buffer_size'] = self._count
                 metrics['using_headgait'] = True
                 
                 # Track cumulative strides based on initial contacts (more reliable)
@@ -122,7 +301,8 @@ class GaitAnalyzer:
                     new_ics = current_ic_count - self.last_ic_count
                     self.total_ics += new_ics
                     self.last_ic_count = current_ic_count
-                    print(f"🦶 +{new_ics} ICs detected → Total ICs: {self.total_ics} → Total Strides: {self.total_ics // 2}")
+                    logger.info("🦶 +%d ICs detected → Total ICs: %d → Total Strides: %d",
+                                new_ics, self.total_ics, self.total_ics // 2)
                 elif current_ic_count < self.last_ic_count:
                     # Buffer rolled over, reset tracking
                     self.last_ic_count = current_ic_count
@@ -134,43 +314,89 @@ class GaitAnalyzer:
                 
                 self.last_metrics = metrics
                 return metrics
-            except Exception as e:
-                print(f"❌ Error in HeadGait processing: {e}")
-                import traceback
-                traceback.print_exc()
+            except Exception:
+                logger.exception("❌ Error in HeadGait processing")
                 # Continue to fallback
         
         # Fallback: Simple heuristic algorithm
         return self._simple_analysis()
     
+    def analyze_payload(self) -> str:
+        """
+        Serialized metrics for the current buffer. The early-exit
+        branches splice counters into pre-built JSON templates (mirroring
+        analyze()'s dicts); only a full analysis pays for dict building
+        and encoding.
+        """
+        headgait = 'true' if self.use_headgait else 'false'
+        if self._count < 100:
+            return _INSUFFICIENT_TEMPLATE % (self.total_strides, self._count, headgait)
+        if self._az_ema_var < MOTION_THRESHOLD:
+            # Nothing meaningful changed since the last stationary
+            # response: resend it for up to 2s before even re-splicing
+            # the template (only stationary payloads are ever cached, so
+            # a walking-tick payload can't be replayed here)
+            now = time.monotonic()
+            if self._last_payload is not None and now - self._last_compute < 2.0:
+                return self._last_payload
+            payload = _STATIONARY_TEMPLATE % (self.total_strides, self._count, headgait)
+            self._last_payload = payload
+            self._last_compute = now
+            return payload
+
+        metrics = self.analyze()
+        if metrics['status'] == 'analyzing' or metrics['status'] == 'analyzing_simple':
+            logger.debug(
+                "Speed: %s m/s | Cadence: %s steps/min | Strides: %s | Buffer: %s (headgait=%s)",
+                metrics['gait_speed'], metrics['cadence'],
+                metrics['stride_count'], metrics['buffer_size'],
+                metrics.get('using_headgait')
+            )
+        payload = json_dumps(metrics)
+        # Invalidate the resend cache: after a moving tick the next
+        # stationary response must come from the template, not replay
+        # this payload's nonzero speed/cadence
+        self._last_payload = None
+        return payload
+
     def _simple_analysis(self) -> Dict:
         """Simple fallback analysis when HeadGait is not available"""
-        import numpy as np
-        from scipy.signal import find_peaks
-        
         # Extract acceleration Z
-        accel_z = np.array([d['accelZ'] for d in self.data_buffer])
+        accel_z = self.column_view('accelZ')
         
-        # Simple peak detection for initial contacts
+        # Simple peak detection for initial contacts. Mean/std come from
+        # the running full-buffer sums (O(1)) instead of two O(N)
+        # reductions over the window
+        n = self._count
+        mean_az = self._sum_az / n
+        std_az = max(self._sumsq_az / n - mean_az * mean_az, 0.0) ** 0.5
         # Increased threshold to reduce false positives from noise
-        peaks, _ = find_peaks(
-            accel_z,
-            height=np.mean(accel_z) + 1.0 * np.std(accel_z),  # Increased from 0.5 to 1.0
-            distance=int(self.sampling_rate * 0.5),  # Min 0.5s between steps (was 0.4s)
-            prominence=0.2  # Added: peak must be prominent enough
-        )
+        height = mean_az + 1.0 * std_az  # Increased from 0.5 to 1.0
+        distance = int(self.sampling_rate * 0.5)  # Min 0.5s between steps (was 0.4s)
+        prominence = 0.2  # Peak must be prominent enough
+
+        if NUMBA_AVAILABLE:
+            peaks = detect_ics(
+                np.ascontiguousarray(accel_z, dtype=np.float64),
+                height, distance, prominence
+            )
+        else:
+            peaks, _ = find_peaks(
+                accel_z, height=height, distance=distance, prominence=prominence
+            )
         
         # Calculate cadence
         if len(peaks) > 1:
-            time_span = len(self.data_buffer) / self.sampling_rate
+            time_span = self._count / self.sampling_rate
             cadence = (len(peaks) / time_span) * 60
             stride_count = len(peaks) // 2
         else:
             cadence = 0.0
             stride_count = 0
-        
-        # Estimate speed from movement variance (rough approximation)
-        movement_variance = np.std([d['accelZ'] for d in self.data_buffer])
+
+        # Estimate speed from movement variance (rough approximation);
+        # reuse the accumulator-derived std from above
+        movement_variance = std_az
         estimated_speed = min(movement_variance * 0.5, 4.0)
         
         # If very little movement detected, set speed to 0
@@ -184,7 +410,8 @@ class GaitAnalyzer:
             new_ics = ic_count - self.last_ic_count
             self.total_ics += new_ics
             self.last_ic_count = ic_count
-            print(f"🦶 +{new_ics} ICs detected (fallback) → Total ICs: {self.total_ics} → Total Strides: {self.total_ics // 2}")
+            logger.info("🦶 +%d ICs detected (fallback) → Total ICs: %d → Total Strides: %d",
+                        new_ics, self.total_ics, self.total_ics // 2)
         elif ic_count < self.last_ic_count:
             # Buffer rolled over
             self.last_ic_count = ic_count
@@ -193,81 +420,141 @@ class GaitAnalyzer:
         self.total_strides = self.total_ics // 2
         
         metrics = {
-            'gait_speed': round(estimated_speed, 2),
+            # Raw floats: the dashboard formats with toFixed(), so
+            # server-side rounding is wasted work
+            'gait_speed': estimated_speed,
             'stride_count': stride_count,
             'total_strides': self.total_strides,
-            'cadence': round(cadence, 1),
+            'cadence': cadence,
             'initial_contacts': len(peaks),
             'total_initial_contacts': self.total_ics,
             'status': 'analyzing_simple',
-            'buffer_size': len(self.data_buffer),
+            'buffer_size': self._count,
             'using_headgait': False
         }
         
         self.last_metrics = metrics
         return metrics
 
-# Global analyzer instance
-analyzer = GaitAnalyzer()
+# Receive-only dashboard connections (path /viewer). Metrics are computed
+# once per tick and the serialized payload is fanned out to all of them.
+SUBSCRIBERS = set()
+
+async def broadcast_metrics(payload: str):
+    """Send one pre-serialized payload to every subscribed viewer"""
+    if SUBSCRIBERS:
+        await asyncio.gather(
+            *(ws.send(payload) for ws in SUBSCRIBERS),
+            return_exceptions=True
+        )
+
+async def viewer_handler(websocket):
+    """Hold a receive-only viewer connection open and feed it broadcasts"""
+    client_id = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
+    logger.info("👀 Viewer connected: %s", client_id)
+    SUBSCRIBERS.add(websocket)
+    try:
+        await websocket.wait_closed()
+    finally:
+        SUBSCRIBERS.discard(websocket)
+        logger.info("👋 Viewer disconnected: %s", client_id)
 
 async def websocket_handler(websocket):
     """Handle WebSocket connections"""
+    # Dashboards connect on /viewer and only receive broadcast metrics;
+    # everything else is treated as an IMU sender. (websockets >= 13
+    # exposes the path on .request, older versions directly on the
+    # connection.)
+    request = getattr(websocket, 'request', None)
+    path = request.path if request is not None else getattr(websocket, 'path', '/')
+    if path.startswith('/viewer'):
+        await viewer_handler(websocket)
+        return
+
     client_id = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
-    print(f"🔗 Client connected: {client_id}")
-    
-    # Reset cumulative counters for new session
-    analyzer.total_strides = 0
-    analyzer.total_ics = 0
-    analyzer.last_ic_count = 0
-    analyzer.session_start_time = None
-    analyzer.data_buffer.clear()
-    print(f"🔄 Reset counters for new session")
+    logger.info("🔗 Client connected: %s", client_id)
+
+    # One analyzer per connection: counters, ring buffer and the
+    # processor's streaming caches all start fresh, and concurrent
+    # senders can't corrupt each other's sessions
+    analyzer = GaitAnalyzer()
+    logger.info("🔄 Fresh analyzer for new session")
     
     try:
-        sample_count = 0
-        
-        async for message in websocket:
+        # A reader task pumps frames into a queue; the consumer drains
+        # everything already queued before analyzing, so a burst of
+        # backlogged frames costs one analyze+send instead of one each
+        inbound = asyncio.Queue()
+
+        async def _pump():
             try:
-                # Parse incoming IMU data
-                data = json.loads(message)
-                
-                # Add to buffer
-                analyzer.add_data_point(data)
-                sample_count += 1
-                
-                # Process periodically (every 10 samples = ~0.5s at 20Hz)
-                if sample_count % 10 == 0:
-                    metrics = analyzer.analyze()
-                    await websocket.send(json.dumps(metrics))
-                    
-                    # Log status
-                    if metrics['status'] == 'analyzing' or metrics['status'] == 'analyzing_simple':
-                        status_icon = "✅" if metrics.get('using_headgait') else "⚡"
-                        print(f"{status_icon} Speed: {metrics['gait_speed']} m/s | "
-                              f"Cadence: {metrics['cadence']} steps/min | "
-                              f"Strides: {metrics['stride_count']} | "
-                              f"Buffer: {metrics['buffer_size']}")
-                
-            except json.JSONDecodeError as e:
-                print(f"❌ Invalid JSON from {client_id}: {e}")
-            except Exception as e:
-                print(f"❌ Error processing message: {e}")
-                import traceback
-                traceback.print_exc()
-    
+                async for message in websocket:
+                    await inbound.put(message)
+            finally:
+                await inbound.put(None)  # sentinel: connection closed
+
+        pump = asyncio.create_task(_pump())
+        sample_count = 0
+        closed = False
+
+        while not closed:
+            batch = [await inbound.get()]
+            while len(batch) < MAX_BATCH_FRAMES:
+                try:
+                    batch.append(inbound.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            if batch[-1] is None:
+                closed = True
+                batch.pop()
+            if not batch:
+                break
+
+            analyzed_at = sample_count // 10
+            for message in batch:
+                try:
+                    # Parse incoming IMU data (typed decode validates
+                    # fields in one pass when msgspec is available)
+                    if decode_imu is not None:
+                        data = decode_imu(message)
+                    else:
+                        data = json_loads(message)
+
+                    # Add to buffer
+                    analyzer.add_data_point(data)
+                    sample_count += 1
+
+                except _DECODE_ERRORS as e:
+                    logger.warning("❌ Invalid IMU frame from %s: %s", client_id, e)
+                except Exception:
+                    logger.exception("❌ Error processing message")
+
+            # Process periodically (every 10 samples = ~0.5s at 20Hz),
+            # at most once per drained batch. analyze() is synchronous
+            # CPU work (filtering, model inference); run it on a worker
+            # thread so it doesn't block the event loop for other clients
+            if sample_count // 10 > analyzed_at:
+                async with analyzer.analyze_lock:
+                    payload = await asyncio.to_thread(analyzer.analyze_payload)
+                await websocket.send(payload)
+                await broadcast_metrics(payload)
+
+        # Surface the close reason (ConnectionClosedOK/Error) from the
+        # reader task to the handlers below
+        await pump
+
     except websockets.exceptions.ConnectionClosedOK:
-        print(f"👋 Client disconnected gracefully: {client_id}")
+        logger.info("👋 Client disconnected gracefully: %s", client_id)
     except websockets.exceptions.ConnectionClosedError as e:
-        print(f"⚠️  Client disconnected with error: {client_id} - {e}")
-    except Exception as e:
-        print(f"❌ Unexpected error with {client_id}: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.warning("⚠️  Client disconnected with error: %s - %s", client_id, e)
+    except Exception:
+        logger.exception("❌ Unexpected error with %s", client_id)
     finally:
-        print(f"🔌 Handler closed for {client_id}")
+        logger.info("🔌 Handler closed for %s", client_id)
 
 async def main():
     """Start WebSocket server"""
+    _log_listener.start()
     print("=" * 60)
     print("🚀 HEAD GAIT - Real-time Gait Analysis Server")
     print("=" * 60)
@@ -298,6 +585,8 @@ async def main():
 
 if __name__ == "__main__":
     try:
+        if UVLOOP_AVAILABLE:
+            uvloop.install()
         asyncio.run(main())
     except KeyboardInterrupt:
         print("\n👋 Server stopped by user")